@@ -17,32 +17,83 @@ logger = get_logger(source="main")
 bot = Bot()
 
 
+def get_stateful_plugin_list(bot: Bot) -> list[type[NYAPlugin[Any, Any, Any]]]:
+    # 只有配置了状态存储文件名的插件需要加载/存储状态，其余插件直接跳过
+    return [
+        plugin
+        for plugin in NYAPlugin.registered_nyaplugin_list
+        if plugin.is_stateful(bot)
+    ]
+
+
+def log_plugin_state_exceptions(
+    bot: Bot,
+    plugin_list: list[type[NYAPlugin[Any, Any, Any]]],
+    result_list: list[Any],
+    event: str,
+):
+    # gather 使用 return_exceptions=True，单个插件失败不影响其他插件，在这里统一记录
+    for plugin, result in zip(plugin_list, result_list):
+        if isinstance(result, BaseException):
+            logger.error(event, bot=bot, plugin=plugin.__name__, exc_info=result)
+
+
 @bot.bot_run_hook
 async def load_state(bot: Bot):
     logger.info("Bot run hook: load_state", bot=bot)
-    for plugin in NYAPlugin.registered_nyaplugin_list:
+    plugin_list = get_stateful_plugin_list(bot)
+    for plugin in plugin_list:
         logger.info("Loading state: ", bot=bot, plugin=plugin.__name__)
 
-        await plugin.load_state(bot)
+    result_list = await asyncio.gather(
+        *(plugin.load_state(bot) for plugin in plugin_list), return_exceptions=True
+    )
+    log_plugin_state_exceptions(bot, plugin_list, result_list, "Load state failed")
 
 
 @bot.bot_exit_hook
 async def save_state(bot: Bot):
     logger.info("Bot exit hook: save_state", bot=bot)
-    for plugin in NYAPlugin.registered_nyaplugin_list:
+    plugin_list = get_stateful_plugin_list(bot)
+    for plugin in plugin_list:
         logger.info("Saving state: ", bot=bot, plugin=plugin.__name__)
 
-        await plugin.save_state(bot)
+    result_list = await asyncio.gather(
+        *(plugin.save_state(bot) for plugin in plugin_list), return_exceptions=True
+    )
+    log_plugin_state_exceptions(bot, plugin_list, result_list, "Save state failed")
+
+
+def watch_websocket_established(adapter: CQHTTPAdapter) -> asyncio.Event:
+    """
+    返回一个在适配器 websocket 建立时被设置的事件。
+
+    alicebot 没有提供连接建立的回调，这里包装实例的 handle_websocket：进入该方法时 websocket 已经赋值。
+    """
+    websocket_established = asyncio.Event()
+    if adapter.websocket is not None:
+        websocket_established.set()
+        return websocket_established
+
+    handle_websocket = adapter.handle_websocket
+
+    async def handle_websocket_and_notify() -> None:
+        if not websocket_established.is_set():
+            websocket_established.set()
+        await handle_websocket()
+
+    adapter.handle_websocket = handle_websocket_and_notify
+    return websocket_established
 
 
 async def send_after_websocket_established(
     adapter: CQHTTPAdapter,
+    websocket_established: asyncio.Event,
     message: BuildMessageType[CQHTTPMessageSegment],
     message_type: Literal["private", "group"],
     id_: int,
 ):
-    while adapter.websocket is None:
-        await asyncio.sleep(0.001)
+    await websocket_established.wait()
 
     await adapter.send(message, message_type, id_)
 
@@ -65,7 +116,11 @@ async def start_report(adapter: Adapter[Any, Any]):
 
     asyncio.create_task(
         send_after_websocket_established(
-            adapter, "我，堂堂复活！", "group", bot_report_gid
+            adapter,
+            watch_websocket_established(adapter),
+            "我，堂堂复活！",
+            "group",
+            bot_report_gid,
         )
     )
 
@@ -1,21 +1,195 @@
 import inspect
 from abc import abstractmethod
-from types import NoneType
+from functools import lru_cache
+from itertools import islice, repeat
+from types import NoneType, UnionType
 from typing import (
+    AbstractSet,
     Any,
     Awaitable,
     Callable,
+    Iterable,
+    Mapping,
     Optional,
     Sequence,
     Union,
     final,
     get_args,
     get_origin,
+    get_type_hints,
     override,
 )
 
 from alicebot import Plugin
 from alicebot.typing import ConfigT, EventT, StateT
+from structlog import get_logger
+
+# 这里不提前 bind()：模块在 alicebot 配置 structlog 之前加载
+logger = get_logger(module=__name__)
+
+
+@lru_cache(maxsize=None)
+def _get_func_param_desc_list(
+    func: Callable[..., Any],
+) -> tuple[inspect.Parameter, ...]:
+    """
+    读取回调函数的形参列表（去掉开头的 self 参数）。
+    inspect.signature 开销较大，按函数缓存，重复构造 Function 时不再重新解析。
+    注解通过 get_type_hints 解析，使用 from __future__ import annotations 的字符串注解也能与类型比较。
+
+    :param Callable[..., Any] func: 回调函数
+    """
+    try:
+        type_hint_map = get_type_hints(func)
+    except (NameError, TypeError):
+        # 无法解析的注解保持原样，之后的类型检查会报告不匹配
+        type_hint_map = {}
+
+    return tuple(
+        func_param_desc.replace(
+            annotation=type_hint_map.get(
+                func_param_desc.name, func_param_desc.annotation
+            )
+        )
+        for func_param_desc in islice(
+            inspect.signature(func).parameters.values(), 1, None
+        )
+    )
+
+
+_BOOL_STR_MAP = {"true": True, "1": True, "false": False, "0": False}
+
+
+def _parse_bool(raw_arg: str) -> bool:
+    """
+    将原始参数转换为 bool。
+    不能直接用 bool 转换：bool("false") 的结果是 True。
+
+    :param str raw_arg: 原始参数，接受 true/false/1/0（不区分大小写）
+    :raise ValueError: 原始参数不是合法的 bool 值时抛出异常
+    """
+    try:
+        return _BOOL_STR_MAP[raw_arg.lower()]
+    except KeyError:
+        raise ValueError(f"Invalid bool value: {raw_arg!r}") from None
+
+
+def _get_converter(type_: type) -> Callable[[str], Any]:
+    """
+    返回将原始参数转换到目标类型的函数，在构造 Function 时确定。
+
+    :param type type_: 参数类型
+    """
+    if type_ is bool:
+        return _parse_bool
+    return type_
+
+
+def _split_fixed_param_desc_list(
+    fixed_param_desc_list: list[tuple[str, type, str]],
+) -> tuple[tuple[str, ...], tuple[type, ...], tuple[str, ...]]:
+    """
+    把 [(参数名, 参数类型, 参数描述), ...] 拆成 (参数名元组, 参数类型元组, 参数描述元组)。
+
+    :param list[tuple[str, type, str]] fixed_param_desc_list: 固定参数描述列表
+    :return tuple[tuple[str, ...], tuple[type, ...], tuple[str, ...]]: 拆分后的三个元组
+    """
+    if not fixed_param_desc_list:
+        return (), (), ()
+    names, types, descs = zip(*fixed_param_desc_list)
+    return names, types, descs
+
+
+def _has_fixed_param_type_mismatch(
+    func_param_desc_list: Sequence[inspect.Parameter],
+    type_list: Sequence[type],
+) -> bool:
+    """
+    逐个比较函数签名中的参数注解与参数描述中的类型，调用前需保证两者长度一致。
+
+    :param Sequence[inspect.Parameter] func_param_desc_list: 函数签名中的形参列表
+    :param Sequence[type] type_list: 固定参数类型列表
+    :return bool: 存在不匹配的参数时返回 True
+    """
+    for func_param_desc, type_ in zip(func_param_desc_list, type_list):
+        # 类型是单例，比较身份即可，不必走 __eq__
+        if func_param_desc.annotation is not type_:
+            return True
+    return False
+
+
+@lru_cache(maxsize=None)
+def _is_optional(annotation: Any) -> bool:
+    """
+    判断注解是否为 Optional[...]（包括 X | None 写法）。
+
+    :param Any annotation: 参数注解
+    :return bool: 是 Optional 时返回 True
+    """
+    return get_origin(annotation) in (Union, UnionType) and NoneType in get_args(
+        annotation
+    )
+
+
+@lru_cache(maxsize=None)
+def _is_optional_of(annotation: Any, type_: type) -> bool:
+    """
+    判断注解是否恰好为 Optional[type_]，不必每次构造 Optional[type_] 再比较。
+
+    :param Any annotation: 参数注解
+    :param type type_: 期望的类型
+    :return bool: 匹配时返回 True
+    """
+    return _is_optional(annotation) and set(get_args(annotation)) == {
+        type_,
+        NoneType,
+    }
+
+
+def _build_arg_error_tmpl(name: str, type_name: str) -> tuple[str, str]:
+    """
+    生成参数类型错误时的 (日志模板, 回复模板)，模板中以 {arg!r} 表示传入的原始参数。
+
+    :param str name: 参数名
+    :param str type_name: 参数类型名
+    :return tuple[str, str]: 日志模板与回复模板
+    """
+    # 参数名和类型名中的花括号需要转义，避免被 str.format 解析
+    name = name.replace("{", "{{").replace("}", "}}")
+    type_name = type_name.replace("{", "{{").replace("}", "}}")
+    return (
+        f"Invalid argument: expected {type_name}, got {{arg!r}}",
+        f"参数类型错误：参数 {name} 为 {type_name} 类型，但传入 {{arg!r}}",
+    )
+
+
+def _get_type_name(type_: Any) -> str:
+    # 注解不一定是类型（例如字符串形式的注解），没有 __name__ 时退化为 str
+    return getattr(type_, "__name__", str(type_))
+
+
+def _format_param_type_mismatch(
+    expected_type_list: Sequence[Any],
+    got_type_list: Sequence[Any],
+    *,
+    expected_extra: Optional[str] = None,
+    got_extra: Optional[str] = None,
+) -> str:
+    """
+    生成参数描述与函数签名不匹配时的错误信息，只在检查失败时调用。
+
+    :param Sequence[Any] expected_type_list: 参数描述中的固定参数类型
+    :param Sequence[Any] got_type_list: 函数签名中的参数注解
+    :param Optional[str] expected_extra: 附加在期望类型之后的内容，例如可选参数/可变参数
+    :param Optional[str] got_extra: 附加在实际类型之后的内容
+    """
+    expected = str([_get_type_name(type_) for type_ in expected_type_list])
+    if expected_extra is not None:
+        expected += f", {expected_extra}"
+    got = str([_get_type_name(type_) for type_ in got_type_list])
+    if got_extra is not None:
+        got += f", {got_extra}"
+    return f"Invalid parameter type: expected: ({expected}), got: ({got})"
 
 
 class ReturnValue:
@@ -29,6 +203,8 @@ class ReturnValue:
     :var bool need_help: 是否需要输出帮助信息
     """
 
+    __slots__ = ("code", "log", "reply", "report", "need_help")
+
     def __init__(
         self,
         code: int,
@@ -51,6 +227,123 @@ class Function:
     限用于 MessageEvent 的处理函数。
     """
 
+    __slots__ = (
+        "func",
+        "fixed_param_desc_list",
+        "_names",
+        "_types",
+        "_descs",
+        "_n_fixed",
+        "_type_names",
+        "_converters",
+        "_arity_log_tmpl",
+        "_arity_reply_tmpl",
+        "_arg_error_tmpls",
+        "_param_inline",
+        "_param_desc",
+    )
+
+    @final
+    def _init_fixed_params(
+        self,
+        func: Callable[..., ReturnValue | Awaitable[ReturnValue]],
+        fixed_param_desc_list: list[tuple[str, type, str]],
+    ) -> None:
+        """
+        初始化固定参数部分并检查函数签名，各子类在此之后只需补充可选/可变参数部分。
+        调用前子类需设置好 _check() 用到的其余成员。
+
+        :param Callable[..., ReturnValue | Awaitable[ReturnValue]] func: 回调函数
+        :param list[tuple[str, type, str]] fixed_param_desc_list: 固定参数的描述
+        :raise ValueError: 函数签名检查不通过时抛出异常
+        """
+        self.func = func
+        self.fixed_param_desc_list = fixed_param_desc_list
+        # 预先把参数描述拆成名称、类型、说明三个并列的元组，之后不再按下标访问
+        self._names, self._types, self._descs = _split_fixed_param_desc_list(
+            fixed_param_desc_list
+        )
+        self._check()
+
+        self._n_fixed = len(fixed_param_desc_list)
+        self._type_names = tuple(type_.__name__ for type_ in self._types)
+        self._converters = tuple(_get_converter(type_) for type_ in self._types)
+        # 出错时的提示模板只依赖参数描述，构造时生成一次，出错时只需 str.format
+        self._arg_error_tmpls = tuple(
+            _build_arg_error_tmpl(name, type_name)
+            for name, type_name in zip(self._names, self._type_names)
+        )
+
+        # 参数说明只依赖参数描述，构造时生成一次；子类在后面追加可选/可变参数
+        self._param_inline = " ".join(
+            f"<{name}:{type_name}>"
+            for name, type_name in zip(self._names, self._type_names)
+        )
+        self._param_desc = "\n".join(
+            f"* {name}：{desc}" for name, desc in zip(self._names, self._descs)
+        )
+
+    @final
+    def _check_arity(self, n: int) -> Optional[ReturnValue]:
+        """
+        参数数量不足时返回错误，子类另行检查上限。
+
+        :param int n: 传入的参数数量
+        :return Optional[ReturnValue]: 参数数量错误时返回错误，否则返回 None
+        """
+        if n < self._n_fixed:
+            return self._build_arity_error(n)
+        return None
+
+    @final
+    def _build_arity_error(self, n: int) -> ReturnValue:
+        return ReturnValue(
+            1,
+            log=self._arity_log_tmpl.format(n=n),
+            reply=self._arity_reply_tmpl.format(n=n),
+            need_help=True,
+        )
+
+    @final
+    @staticmethod
+    def _convert_args(
+        converters: Iterable[Callable[[str], Any]],
+        arg_error_tmpls: Iterable[tuple[str, str]],
+        raw_arg_list: Iterable[str],
+        converted_arg_list: list[Any],
+    ) -> Optional[ReturnValue]:
+        """
+        依次转换原始参数并追加到 converted_arg_list。
+
+        :param Iterable[Callable[[str], Any]] converters: 每个参数的转换函数
+        :param Iterable[tuple[str, str]] arg_error_tmpls: 每个参数的 (日志模板, 回复模板)
+        :param Iterable[str] raw_arg_list: 原始参数
+        :param list[Any] converted_arg_list: 转换结果追加到这里
+        :return Optional[ReturnValue]: 转换失败时返回错误，否则返回 None
+        """
+        # 热路径上用到的属性先绑定到局部变量；整个循环只设置一次 try，失败时循环变量即为出错的参数
+        append = converted_arg_list.append
+        try:
+            for converter, arg_error_tmpl, raw_arg in zip(
+                converters, arg_error_tmpls, raw_arg_list
+            ):
+                append(converter(raw_arg))
+        except (ValueError, TypeError):
+            pass
+        except Exception:
+            # 自定义的类型转换函数可能抛出其他异常，同样按参数类型错误回复，并记录异常
+            logger.exception("Argument converter raised", arg=raw_arg)
+        else:
+            return None
+
+        log_tmpl, reply_tmpl = arg_error_tmpl
+        return ReturnValue(
+            1,
+            log=log_tmpl.format(arg=raw_arg),
+            reply=reply_tmpl.format(arg=raw_arg),
+            need_help=True,
+        )
+
     @abstractmethod
     def _check(self) -> None:
         """
@@ -99,6 +392,8 @@ class FunctionWithFixedParams(Function):
     :var list[tuple[str, type, str]] fixed_params_desc: 固定参数的描述，结构为 [(参数名, 参数类型, 参数描述), ...]
     """
 
+    __slots__ = ()
+
     class _NeverType:
         pass
 
@@ -107,17 +402,20 @@ class FunctionWithFixedParams(Function):
         func: Callable[..., ReturnValue | Awaitable[ReturnValue]],
         fixed_param_desc_list: list[tuple[str, type, str]],
     ):
-        self.func = func
-        self.fixed_param_desc_list = fixed_param_desc_list
-        self._check()
+        self._init_fixed_params(func, fixed_param_desc_list)
+
+        self._arity_log_tmpl = (
+            f"Invalid argument number: expected {self._n_fixed}, got {{n}}"
+        )
+        self._arity_reply_tmpl = (
+            f"参数数量错误：需要 {self._n_fixed} 个参数，但传入 {{n}} 个参数"
+        )
 
     @override
     @final
     def _check(self) -> None:
-        # 获取函数签名
-        func_signature = inspect.signature(self.func)
         # 读取形参列表，去掉开头的 self 参数
-        func_param_desc_list = list(func_signature.parameters.values())[1:]
+        func_param_desc_list = _get_func_param_desc_list(self.func)
 
         # 只允许固定参数
         for func_param_desc in func_param_desc_list:
@@ -129,24 +427,17 @@ class FunctionWithFixedParams(Function):
 
         if (
             # 检查参数数量是否匹配
-            len(func_param_desc_list) != len(self.fixed_param_desc_list)
+            len(func_param_desc_list) != len(self._types)
             # 检查参数类型是否匹配
-            or any(
-                func_param_desc.annotation != fixed_param_desc[1]
-                for func_param_desc, fixed_param_desc in zip(
-                    func_param_desc_list, self.fixed_param_desc_list
-                )
-            )
+            or _has_fixed_param_type_mismatch(func_param_desc_list, self._types)
         ):
             raise ValueError(
-                "Invalid parameter type: "
-                "expected: "
-                + (
-                    f"({[fixed_param_desc[1].__name__ for fixed_param_desc in self.fixed_param_desc_list]})"
-                )
-                + ", got: "
-                + (
-                    f"({[func_param_desc.annotation.__name__ for func_param_desc in func_param_desc_list]})"
+                _format_param_type_mismatch(
+                    self._types,
+                    [
+                        func_param_desc.annotation
+                        for func_param_desc in func_param_desc_list
+                    ],
                 )
             )
 
@@ -156,28 +447,15 @@ class FunctionWithFixedParams(Function):
         self, plugin: Plugin[EventT, StateT, ConfigT], raw_arg_list: list[str]
     ) -> ReturnValue | Awaitable[ReturnValue]:
         # 检查参数数量
-        if len(raw_arg_list) != len(self.fixed_param_desc_list):
-            return ReturnValue(
-                1,
-                log=f"Invalid argument number: expected {len(self.fixed_param_desc_list)}, got {len(raw_arg_list)}",
-                reply=f"参数数量错误：需要 {len(self.fixed_param_desc_list)} 个参数，但传入 {len(raw_arg_list)} 个参数",
-                need_help=True,
-            )
+        if len(raw_arg_list) != self._n_fixed:
+            return self._build_arity_error(len(raw_arg_list))
 
         # 尝试将原始参数转换到目标类型
         converted_arg_list: list[Any] = []
-        for raw_fixed_arg, fixed_param_desc in zip(
-            raw_arg_list, self.fixed_param_desc_list
+        if error := self._convert_args(
+            self._converters, self._arg_error_tmpls, raw_arg_list, converted_arg_list
         ):
-            try:
-                converted_arg_list.append(fixed_param_desc[1](raw_fixed_arg))
-            except:
-                return ReturnValue(
-                    1,
-                    log=f"Invalid argument: expected {fixed_param_desc[1].__name__}, got {raw_fixed_arg!r}",
-                    reply=f"参数类型错误：参数 {fixed_param_desc[0]} 为 {fixed_param_desc[1].__name__} 类型，但传入 {raw_fixed_arg!r}",
-                    need_help=True,
-                )
+            return error
 
         # 调用回调函数
         return self.func(plugin, *converted_arg_list)
@@ -185,18 +463,12 @@ class FunctionWithFixedParams(Function):
     @override
     @final
     def get_param_inline(self) -> str:
-        return " ".join(
-            f"<{fixed_param_desc[0]}:{fixed_param_desc[1].__name__}>"
-            for fixed_param_desc in self.fixed_param_desc_list
-        )
+        return self._param_inline
 
     @override
     @final
     def get_param_desc(self) -> str:
-        return "\n".join(
-            f"* {fixed_param_desc[0]}：{fixed_param_desc[2]}"
-            for fixed_param_desc in self.fixed_param_desc_list
-        )
+        return self._param_desc
 
 
 class FunctionWithOptionalParam(Function):
@@ -209,22 +481,47 @@ class FunctionWithOptionalParam(Function):
     :var tuple[str, type, str] optional_param_desc: 可选参数的描述，结构为 (参数名, 参数类型, 参数描述)
     """
 
+    __slots__ = (
+        "optional_param_desc",
+        "_optional_name",
+        "_optional_type",
+        "_optional_type_name",
+        "_optional_converter",
+        "_optional_arg_error_tmpl",
+    )
+
     def __init__(
         self,
         func: Callable[..., ReturnValue | Awaitable[ReturnValue]],
         fixed_param_desc_list: list[tuple[str, type, str]],
         optional_param_desc: tuple[str, type, str],
     ):
-        self.func = func
-        self.fixed_param_desc_list = fixed_param_desc_list
         self.optional_param_desc = optional_param_desc
-        self._check()
+        self._init_fixed_params(func, fixed_param_desc_list)
+
+        self._arity_log_tmpl = f"Invalid argument number: expected {self._n_fixed} or {self._n_fixed + 1}, got {{n}}"
+        self._arity_reply_tmpl = f"参数数量错误：需要 {self._n_fixed} 或 {self._n_fixed + 1} 个参数，但传入 {{n}} 个参数"
+        self._optional_name = optional_param_desc[0]
+        self._optional_type = optional_param_desc[1]
+        self._optional_converter = _get_converter(optional_param_desc[1])
+        self._optional_type_name = optional_param_desc[1].__name__
+        self._optional_arg_error_tmpl = _build_arg_error_tmpl(
+            self._optional_name, f"Optional[{self._optional_type_name}]"
+        )
+
+        self._param_inline += f"[<{self._optional_name}:{self._optional_type_name}>]"
+        optional_param_desc_str = (
+            f"* {optional_param_desc[0]}：{optional_param_desc[2]}"
+        )
+        self._param_desc = (
+            f"{self._param_desc}\n{optional_param_desc_str}"
+            if self._param_desc
+            else optional_param_desc_str
+        )
 
     def _check(self) -> None:
-        # 获取函数签名
-        func_signature = inspect.signature(self.func)
         # 读取形参列表，去掉开头的 self 参数
-        func_param_desc_list = list(func_signature.parameters.values())[1:]
+        func_param_desc_list = _get_func_param_desc_list(self.func)
 
         # 只接受固定参数
         for func_param_desc in func_param_desc_list:
@@ -236,34 +533,44 @@ class FunctionWithOptionalParam(Function):
 
         if (
             # 检查参数数量是否正确
-            len(func_param_desc_list) != len(self.fixed_param_desc_list) + 1
+            len(func_param_desc_list) != len(self._types) + 1
             # 检查固定参数类型是否匹配
-            or any(
-                func_param_desc.annotation != fixed_param_desc[1]
-                for func_param_desc, fixed_param_desc in zip(
-                    func_param_desc_list[:-1], self.fixed_param_desc_list
-                )
-            )
+            or _has_fixed_param_type_mismatch(func_param_desc_list[:-1], self._types)
             # 检查可选参数类型是否匹配
-            or func_param_desc_list[-1].annotation
-            != Optional[self.optional_param_desc[1]]
+            or not _is_optional_of(
+                func_param_desc_list[-1].annotation, self.optional_param_desc[1]
+            )
         ):
-            raise ValueError(
-                "Invalid parameter type: "
-                "expected: "
-                + (
-                    f"({[fixed_param_desc[1].__name__ for fixed_param_desc in self.fixed_param_desc_list]}, Optional[{self.optional_param_desc[1].__name__}])"
+            expected_type_list = self._types
+            expected_extra = f"Optional[{_get_type_name(self.optional_param_desc[1])}]"
+            # 最后一个参数不是 Optional
+            if not func_param_desc_list or not _is_optional(
+                func_param_desc_list[-1].annotation
+            ):
+                raise ValueError(
+                    _format_param_type_mismatch(
+                        expected_type_list,
+                        [
+                            func_param_desc.annotation
+                            for func_param_desc in func_param_desc_list
+                        ],
+                        expected_extra=expected_extra,
+                    )
                 )
-                + ", got: "
-                + (
-                    f"({[func_param_desc.annotation.__name__ for func_param_desc in func_param_desc_list]})"
-                    # 最后一个参数不是 Optional
-                    if get_origin(func_param_desc_list[-1].annotation) is not Union
-                    or NoneType not in get_args(func_param_desc_list[-1].annotation)
-                    else (
-                        f"({[func_param_desc.annotation.__name__ for func_param_desc in func_param_desc_list[:-1]]}, "
-                        + f"{" | ".join([type_.__name__ for type_ in get_args(func_param_desc_list[-1].annotation) if type_ is not NoneType])} ...)"
+            raise ValueError(
+                _format_param_type_mismatch(
+                    expected_type_list,
+                    [
+                        func_param_desc.annotation
+                        for func_param_desc in func_param_desc_list[:-1]
+                    ],
+                    expected_extra=expected_extra,
+                    got_extra=" | ".join(
+                        _get_type_name(type_)
+                        for type_ in get_args(func_param_desc_list[-1].annotation)
+                        if type_ is not NoneType
                     )
+                    + " ...",
                 )
             )
 
@@ -273,38 +580,23 @@ class FunctionWithOptionalParam(Function):
         raw_arg_list: list[str],
     ) -> ReturnValue | Awaitable[ReturnValue]:
         # 检查参数数量
-        if len(raw_arg_list) < len(self.fixed_param_desc_list):
-            return ReturnValue(
-                1,
-                log=f"Invalid argument number: expected {len(self.fixed_param_desc_list)} or {len(self.fixed_param_desc_list) + 1}, got {len(raw_arg_list)}",
-                reply=f"参数数量错误：需要 {len(self.fixed_param_desc_list)} 或 {len(self.fixed_param_desc_list) + 1} 个参数，但传入 {len(raw_arg_list)} 个参数",
-                need_help=True,
-            )
+        if error := self._check_arity(len(raw_arg_list)):
+            return error
 
         # 尝试将原始参数转换到目标类型
         converted_arg_list: list[Any] = []
-        for raw_fixed_arg, fixed_param_desc in zip(
-            raw_arg_list[: len(self.fixed_param_desc_list)], self.fixed_param_desc_list
+        if error := self._convert_args(
+            self._converters, self._arg_error_tmpls, raw_arg_list, converted_arg_list
         ):
-            try:
-                converted_arg_list.append(fixed_param_desc[1](raw_fixed_arg))
-            except:
-                return ReturnValue(
-                    1,
-                    log=f"Invalid argument: expected {fixed_param_desc[1].__name__}, got {raw_fixed_arg!r}",
-                    reply=f"参数类型错误：参数 {fixed_param_desc[0]} 为 {fixed_param_desc[1].__name__} 类型，但传入 {raw_fixed_arg!r}",
-                    need_help=True,
-                )
-        if len(raw_arg_list) > len(self.fixed_param_desc_list):
-            try:
-                converted_arg_list.append(self.optional_param_desc[1](raw_arg_list[-1]))
-            except:
-                return ReturnValue(
-                    1,
-                    log=f"Invalid argument: expected Optional[{self.optional_param_desc[1].__name__}], got {raw_arg_list[-1]!r}",
-                    reply=f"参数类型错误：参数 {self.optional_param_desc[0]} 为 Optional[{self.optional_param_desc[1].__name__}] 类型，但传入 {raw_arg_list[-1]!r}",
-                    need_help=True,
-                )
+            return error
+        if len(raw_arg_list) > self._n_fixed:
+            if error := self._convert_args(
+                (self._optional_converter,),
+                (self._optional_arg_error_tmpl,),
+                (raw_arg_list[-1],),
+                converted_arg_list,
+            ):
+                return error
         else:
             converted_arg_list.append(None)
 
@@ -314,29 +606,12 @@ class FunctionWithOptionalParam(Function):
     @override
     @final
     def get_param_inline(self) -> str:
-        return (
-            " ".join(
-                f"<{fixed_param_desc[0]}:{fixed_param_desc[1].__name__}>"
-                for fixed_param_desc in self.fixed_param_desc_list
-            )
-            + f"[<{self.optional_param_desc[0]}:{self.optional_param_desc[1].__name__}>]"
-        )
+        return self._param_inline
 
     @override
     @final
     def get_param_desc(self) -> str:
-        fixed_param_desc_str = "\n".join(
-            f"* {fixed_param_desc[0]}：{fixed_param_desc[2]}"
-            for fixed_param_desc in self.fixed_param_desc_list
-        )
-        optional_param_desc_str = (
-            f"* {self.optional_param_desc[0]}：{self.optional_param_desc[2]}"
-        )
-        return (
-            f"{fixed_param_desc_str}\n{optional_param_desc_str}"
-            if fixed_param_desc_str
-            else optional_param_desc_str
-        )
+        return self._param_desc
 
 
 class FunctionWithVariableParams(Function):
@@ -349,22 +624,53 @@ class FunctionWithVariableParams(Function):
     :var tuple[str, type, str] variable_param_desc: 可变参数的描述，结构为 (参数名, 参数类型, 参数描述)
     """
 
+    __slots__ = (
+        "variable_param_desc",
+        "_variable_name",
+        "_variable_type",
+        "_variable_type_name",
+        "_variable_converter",
+        "_variable_arg_error_tmpl",
+    )
+
     def __init__(
         self,
         func: Callable[..., ReturnValue | Awaitable[ReturnValue]],
         fixed_param_desc_list: list[tuple[str, type, str]],
         variable_param_desc: tuple[str, type, str],
     ):
-        self.func = func
-        self.fixed_param_desc_list = fixed_param_desc_list
         self.variable_param_desc = variable_param_desc
-        self._check()
+        self._init_fixed_params(func, fixed_param_desc_list)
+
+        self._arity_log_tmpl = (
+            f"Invalid argument number: expected at least {self._n_fixed}, got {{n}}"
+        )
+        self._arity_reply_tmpl = (
+            f"参数数量错误：需要至少 {self._n_fixed} 个参数，但传入 {{n}} 个参数"
+        )
+        self._variable_name = variable_param_desc[0]
+        self._variable_type = variable_param_desc[1]
+        self._variable_converter = _get_converter(variable_param_desc[1])
+        self._variable_type_name = variable_param_desc[1].__name__
+        self._variable_arg_error_tmpl = _build_arg_error_tmpl(
+            self._variable_name, self._variable_type_name
+        )
+
+        self._param_inline += (
+            f"[<{self._variable_name}:{self._variable_type_name}> ...]"
+        )
+        variable_param_desc_str = (
+            f"* {variable_param_desc[0]}：{variable_param_desc[2]}"
+        )
+        self._param_desc = (
+            f"{self._param_desc}\n{variable_param_desc_str}"
+            if self._param_desc
+            else variable_param_desc_str
+        )
 
     def _check(self) -> None:
-        # 获取函数签名
-        func_signature = inspect.signature(self.func)
         # 读取形参列表，去掉开头的 self 参数
-        func_param_desc_list = list(func_signature.parameters.values())[1:]
+        func_param_desc_list = _get_func_param_desc_list(self.func)
 
         # 只接受位置参数
         for func_param_desc in func_param_desc_list:
@@ -377,30 +683,40 @@ class FunctionWithVariableParams(Function):
 
         if (
             # 检查参数数量是否正确
-            len(func_param_desc_list) != len(self.fixed_param_desc_list) + 1
+            len(func_param_desc_list) != len(self._types) + 1
             # 检查最后一个参数是否为可变参数
             or func_param_desc_list[-1].kind != inspect.Parameter.VAR_POSITIONAL
             # 检查固定参数类型是否匹配
-            or any(
-                func_param_desc.annotation != fixed_param_desc[1]
-                for func_param_desc, fixed_param_desc in zip(
-                    func_param_desc_list[:-1], self.fixed_param_desc_list
-                )
-            )
+            or _has_fixed_param_type_mismatch(func_param_desc_list[:-1], self._types)
             # 检查可变参数类型是否匹配
-            or func_param_desc_list[-1].annotation != self.variable_param_desc[1]
+            or func_param_desc_list[-1].annotation is not self.variable_param_desc[1]
         ):
-            raise ValueError(
-                "Invalid parameter type: "
-                "expected: "
-                + (
-                    f"({[fixed_param_desc[1].__name__ for fixed_param_desc in self.fixed_param_desc_list]}, {self.variable_param_desc[1].__name__} ...)"
+            expected_type_list = self._types
+            expected_extra = f"{_get_type_name(self.variable_param_desc[1])} ..."
+            # 最后一个参数不是可变参数
+            if (
+                not func_param_desc_list
+                or func_param_desc_list[-1].kind != inspect.Parameter.VAR_POSITIONAL
+            ):
+                raise ValueError(
+                    _format_param_type_mismatch(
+                        expected_type_list,
+                        [
+                            func_param_desc.annotation
+                            for func_param_desc in func_param_desc_list
+                        ],
+                        expected_extra=expected_extra,
+                    )
                 )
-                + ", got: "
-                + (
-                    f"({[func_param_desc.annotation.__name__ for func_param_desc in func_param_desc_list]})"
-                    if func_param_desc_list[-1].kind != inspect.Parameter.VAR_POSITIONAL
-                    else f"({[func_param_desc.annotation.__name__ for func_param_desc in func_param_desc_list[:-1]]}, {func_param_desc_list[-1].annotation.__name__} ...)"
+            raise ValueError(
+                _format_param_type_mismatch(
+                    expected_type_list,
+                    [
+                        func_param_desc.annotation
+                        for func_param_desc in func_param_desc_list[:-1]
+                    ],
+                    expected_extra=expected_extra,
+                    got_extra=f"{_get_type_name(func_param_desc_list[-1].annotation)} ...",
                 )
             )
 
@@ -410,38 +726,22 @@ class FunctionWithVariableParams(Function):
         raw_arg_list: list[str],
     ) -> ReturnValue | Awaitable[ReturnValue]:
         # 检查参数数量
-        if len(raw_arg_list) < len(self.fixed_param_desc_list):
-            return ReturnValue(
-                1,
-                log=f"Invalid argument number: expected at least {len(self.fixed_param_desc_list)}, got {len(raw_arg_list)}",
-                reply=f"参数数量错误：需要至少 {len(self.fixed_param_desc_list)} 个参数，但传入 {len(raw_arg_list)} 个参数",
-                need_help=True,
-            )
+        if error := self._check_arity(len(raw_arg_list)):
+            return error
 
-        # 尝试将原始参数转换到目标类型
+        # 尝试将原始参数转换到目标类型，可变参数共用同一个转换函数和错误模板
         converted_arg_list: list[Any] = []
-        for raw_fixed_arg, fixed_param_desc in zip(
-            raw_arg_list[: len(self.fixed_param_desc_list)], self.fixed_param_desc_list
+        if error := self._convert_args(
+            self._converters, self._arg_error_tmpls, raw_arg_list, converted_arg_list
         ):
-            try:
-                converted_arg_list.append(fixed_param_desc[1](raw_fixed_arg))
-            except:
-                return ReturnValue(
-                    1,
-                    log=f"Invalid argument: expected {fixed_param_desc[1].__name__}, got {raw_fixed_arg!r}",
-                    reply=f"参数类型错误：参数 {fixed_param_desc[0]} 为 {fixed_param_desc[1].__name__} 类型，但传入 {raw_fixed_arg!r}",
-                    need_help=True,
-                )
-        for raw_variable_arg in raw_arg_list[len(self.fixed_param_desc_list) :]:
-            try:
-                converted_arg_list.append(self.variable_param_desc[1](raw_variable_arg))
-            except:
-                return ReturnValue(
-                    1,
-                    log=f"Invalid argument: expected {self.variable_param_desc[1].__name__}, got {raw_variable_arg!r}",
-                    reply=f"参数类型错误：参数 {self.variable_param_desc[0]} 为 {self.variable_param_desc[1].__name__} 类型，但传入 {raw_variable_arg!r}",
-                    need_help=True,
-                )
+            return error
+        if error := self._convert_args(
+            repeat(self._variable_converter),
+            repeat(self._variable_arg_error_tmpl),
+            islice(raw_arg_list, self._n_fixed, None),
+            converted_arg_list,
+        ):
+            return error
 
         # 调用回调函数
         return self.func(plugin, *converted_arg_list)
@@ -449,29 +749,32 @@ class FunctionWithVariableParams(Function):
     @override
     @final
     def get_param_inline(self) -> str:
-        return (
-            " ".join(
-                f"<{fixed_param_desc[0]}:{fixed_param_desc[1].__name__}>"
-                for fixed_param_desc in self.fixed_param_desc_list
-            )
-            + f"[<{self.variable_param_desc[0]}:{self.variable_param_desc[1].__name__}> ...]"
-        )
+        return self._param_inline
 
     @override
     @final
     def get_param_desc(self) -> str:
-        fixed_param_desc_str = "\n".join(
-            f"* {fixed_param_desc[0]}：{fixed_param_desc[2]}"
-            for fixed_param_desc in self.fixed_param_desc_list
-        )
-        variable_param_desc_str = (
-            f"* {self.variable_param_desc[0]}：{self.variable_param_desc[2]}"
-        )
-        return (
-            f"{fixed_param_desc_str}\n{variable_param_desc_str}"
-            if fixed_param_desc_str
-            else variable_param_desc_str
-        )
+        return self._param_desc
+
+
+def _update_subtree_full_name(command: "Command", parent_full_name: str) -> None:
+    """
+    更新以 command 为根的子树中所有命令的全称。
+    使用显式栈遍历，避免深层命令树上的递归调用。
+
+    :param Command command: 子树的根
+    :param str parent_full_name: 子树的根的父命令的全称
+    """
+    command_stack = [(command, parent_full_name)]
+    while command_stack:
+        current_command, current_parent_full_name = command_stack.pop()
+        current_command.full_name = f"{current_parent_full_name} {current_command.name}"
+        current_command._update_help_cache()
+        if isinstance(current_command, InternalCommand):
+            command_stack.extend(
+                (subcommand, current_command.full_name)
+                for subcommand in current_command.subcommand_list
+            )
 
 
 class Command:
@@ -480,23 +783,28 @@ class Command:
 
     :var str name: 命令名称
     :var str desc: 命令描述
-    :var Optional[set[str]] limited_roles: 限定身份，为 None 表示所有人可访问
+    :var Optional[frozenset[str]] limited_roles: 限定身份，为 None 表示所有人可访问
     """
 
+    __slots__ = ("name", "desc", "limited_roles", "full_name")
+
     def __init__(self, name: str, desc: str, limited_roles: Optional[set[str]]):
         self.name = name
         self.desc = desc
-        self.limited_roles = limited_roles
+        # 构造后不再修改，统一转为 frozenset，权限检查时不必关心传入的是哪种集合
+        self.limited_roles: Optional[frozenset[str]] = (
+            frozenset(limited_roles) if limited_roles is not None else None
+        )
 
         # 需要在 Command 基类中有这个成员
         self.full_name = name
 
     @abstractmethod
-    def help_info(self, roles: set[str]) -> str:
+    def help_info(self, roles: AbstractSet[str]) -> str:
         """
         输出命令的帮助信息
 
-        :param set[str] roles: 消息发送者身份
+        :param AbstractSet[str] roles: 消息发送者身份
         """
         raise NotImplementedError()
 
@@ -509,6 +817,13 @@ class Command:
         """
         raise NotImplementedError()
 
+    @abstractmethod
+    def _update_help_cache(self) -> None:
+        """
+        重新生成依赖 full_name 的帮助信息缓存，在 full_name 变化后调用。
+        """
+        raise NotImplementedError()
+
 
 class InternalCommand(Command):
     """
@@ -519,8 +834,18 @@ class InternalCommand(Command):
     :var str desc: 命令描述
     :var Optional[set[str]] limited_roles: 限定身份，为 None 表示所有人可访问
     :var list[Command] subcommand_list: 子命令列表
+    :var Mapping[str, Command] subcommand_by_name: 子命令名称到子命令的映射，构造后只读
     """
 
+    __slots__ = (
+        "subcommand_list",
+        "subcommand_by_name",
+        "_subcommand_help_line_list",
+        "_subcommand_limited_roles_list",
+        "_help_header",
+        "_help_info_cache",
+    )
+
     def __init__(
         self,
         name: str,
@@ -531,31 +856,55 @@ class InternalCommand(Command):
         super().__init__(name, desc, limited_roles)
         self.subcommand_list = subcommand_list
 
+        # 按名称查找子命令用的字典；逆序构造使重名时与顺序查找一样取第一个
+        self.subcommand_by_name: Mapping[str, Command] = {
+            subcommand.name: subcommand for subcommand in reversed(subcommand_list)
+        }
+
+        # 子命令列表在构造后不再变化，预先生成帮助信息的每一行及其限定身份
+        self._subcommand_help_line_list = tuple(
+            f"* {subcommand.name}: {subcommand.desc}" for subcommand in subcommand_list
+        )
+        self._subcommand_limited_roles_list = tuple(
+            subcommand.limited_roles for subcommand in subcommand_list
+        )
+        # 身份集合 -> 帮助信息；身份集合来自配置，种类很少，不限制缓存大小
+        self._help_info_cache: dict[frozenset[str], str] = {}
+        self._update_help_cache()
+
+    @final
+    def _update_help_cache(self) -> None:
+        self._help_header = f"{self.full_name}\n{self.desc}\n子命令列表：\n"
+        self._help_info_cache.clear()
+
     @final
-    def help_info(self, roles: set[str]) -> str:
+    def help_info(self, roles: AbstractSet[str]) -> str:
         # 执行到这里说明用户有该命令的权限
-        assert (self.limited_roles is None) or (roles & self.limited_roles)
+        assert (self.limited_roles is None) or not roles.isdisjoint(self.limited_roles)
+
+        # 缓存以身份集合为键，传入 set 等不可哈希的集合时先转为 frozenset（frozenset 原样返回）
+        roles = frozenset(roles)
+        if (help_info := self._help_info_cache.get(roles)) is not None:
+            return help_info
 
         # 应该假设用户至少有一条子命令的权限
-        return (
-            f"{self.full_name}\n"
-            + f"{self.desc}\n"
-            + "子命令列表：\n"
-            + "\n".join(
-                f"* {subcommand.name}: {subcommand.desc}"
-                for subcommand in self.subcommand_list
-                if (
-                    (subcommand.limited_roles is None)
-                    or (roles & subcommand.limited_roles)
+        help_info = self._help_header + "\n".join(
+            [
+                subcommand_help_line
+                for subcommand_help_line, subcommand_limited_roles in zip(
+                    self._subcommand_help_line_list,
+                    self._subcommand_limited_roles_list,
                 )
-            )
+                if (subcommand_limited_roles is None)
+                or not roles.isdisjoint(subcommand_limited_roles)
+            ]
         )
+        self._help_info_cache[roles] = help_info
+        return help_info
 
     @final
     def _update_full_name(self, parent_full_name: str) -> None:
-        self.full_name = f"{parent_full_name} {self.name}"
-        for subcommand in self.subcommand_list:
-            subcommand._update_full_name(self.full_name)
+        _update_subtree_full_name(self, parent_full_name)
 
 
 class RootCommand(InternalCommand):
@@ -570,6 +919,8 @@ class RootCommand(InternalCommand):
     :var list[Command] subcommand_list: 子命令列表
     """
 
+    __slots__ = ()
+
     def __init__(
         self,
         name: str,
@@ -581,7 +932,7 @@ class RootCommand(InternalCommand):
 
         # 主动更新孩子节点的 full_name
         for subcommand in self.subcommand_list:
-            subcommand._update_full_name(self.name)
+            _update_subtree_full_name(subcommand, self.name)
 
 
 class LeafCommand(Command):
@@ -595,6 +946,8 @@ class LeafCommand(Command):
     :var list[Command] subcommand_list: 子命令列表
     """
 
+    __slots__ = ("function", "_help_info")
+
     def __init__(
         self,
         name: str,
@@ -605,21 +958,19 @@ class LeafCommand(Command):
         super().__init__(name, desc, limited_roles)
         self.function = function
 
+        self._update_help_cache()
+
     @abstractmethod
-    def help_info(self, roles: set[str]) -> str:
+    def help_info(self, roles: AbstractSet[str]) -> str:
         """
         输出命令的帮助信息
 
-        :param set[str] roles: 消息发送者身份
+        :param AbstractSet[str] roles: 消息发送者身份
         """
         # 执行到这里说明用户有该命令的权限
-        assert (self.limited_roles is None) or (roles & self.limited_roles)
+        assert (self.limited_roles is None) or not roles.isdisjoint(self.limited_roles)
 
-        return f"{self.full_name} {self.function.get_param_inline()}\n" + (
-            f"参数列表：\n{param_desc}"
-            if (param_desc := self.function.get_param_desc())
-            else "本命令没有参数"
-        )
+        return self._help_info
 
     @abstractmethod
     def _update_full_name(self, parent_full_name: str) -> None:
@@ -629,6 +980,16 @@ class LeafCommand(Command):
         :param str parent_full_name: 父命令的全称
         """
         self.full_name = f"{parent_full_name} {self.name}"
+        self._update_help_cache()
+
+    @final
+    def _update_help_cache(self) -> None:
+        # 叶子命令的帮助信息与身份无关，只依赖 full_name 和参数描述
+        self._help_info = f"{self.full_name} {self.function.get_param_inline()}\n" + (
+            f"参数列表：\n{param_desc}"
+            if (param_desc := self.function.get_param_desc())
+            else "本命令没有参数"
+        )
 
 
 # TODO: test 1) report, 2) optional parameter, 3) auto load/save state
@@ -1,21 +1,41 @@
+import re
 import shlex
 from abc import ABC
 from functools import cached_property
-from typing import Any, Awaitable, Optional, TypeVar, final, override
+from typing import Any, Optional, TypeVar, final, override
 
 from alicebot.adapter.cqhttp.event import GroupMessageEvent
-from pydantic import computed_field
 from structlog import get_logger
 
 from nyaplugin.nyaplugin_base import NYAPlugin, NYAPluginConfig, NYAPluginState
 
-from .command import Command, InternalCommand, LeafCommand, RootCommand
+from .command import Command, InternalCommand, LeafCommand, ReturnValue, RootCommand
 
 EventT = TypeVar("EventT", bound=GroupMessageEvent)
 StateT = TypeVar("StateT", bound="NYAPluginState")
 ConfigT = TypeVar("ConfigT", bound="CQHTTPGroupMessageCommandHandlerPluginConfig")
 
 
+# 插件 command 属性允许的类型，用元组避免每次检查都构造 UnionType
+_COMMAND_TYPES = (RootCommand, LeafCommand)
+
+# shlex 只对引号和反斜杠做特殊处理，只按这几个空白字符拆分
+_SHLEX_SPECIAL_CHAR_SET = frozenset("'\"\\")
+_SHLEX_WHITESPACE_RE = re.compile(r"[ \t\r\n]+")
+
+
+def _split_command(message_str: str) -> list[str]:
+    # 没有引号和反斜杠时 shlex.split 等价于按空白字符拆分，直接用正则拆分，省去 shlex 逐字符解析
+    if _SHLEX_SPECIAL_CHAR_SET.isdisjoint(message_str):
+        stripped_message_str = message_str.strip(" \t\r\n")
+        return (
+            _SHLEX_WHITESPACE_RE.split(stripped_message_str)
+            if stripped_message_str
+            else []
+        )
+    return shlex.split(message_str)
+
+
 class CQHTTPGroupMessageCommandHandlerPluginConfig(NYAPluginConfig):
     # 限制群 ID，值为 None 代表所有群均可用
     limited_group_id_list: Optional[list[int]] = None
@@ -23,21 +43,35 @@ class CQHTTPGroupMessageCommandHandlerPluginConfig(NYAPluginConfig):
     # 身份到 QQ 号的映射，用于限制权限
     role_to_qq_uin_list_map: dict[str, list[int]] = {}
 
-    # 自动生成
+    # 自动生成，仅供内部使用，不加 computed_field，避免出现在序列化结果中
     # ! 使用 model_validator 会有一个问题：上面两个字段可能也会在 model_validator 中提供，导致下面的字段为空
-    @computed_field
     @cached_property
-    def limited_group_id_set(self) -> Optional[set[int]]:
-        return set(self.limited_group_id_list) if self.limited_group_id_list else None
+    def limited_group_id_set(self) -> Optional[frozenset[int]]:
+        return (
+            frozenset(self.limited_group_id_list)
+            if self.limited_group_id_list
+            else None
+        )
 
-    @computed_field
     @cached_property
-    def role_to_qq_uin_set_map(self) -> dict[str, set[int]]:
+    def role_to_qq_uin_set_map(self) -> dict[str, frozenset[int]]:
         return {
-            role: set(qq_uin_list)
+            role: frozenset(qq_uin_list)
             for role, qq_uin_list in self.role_to_qq_uin_list_map.items()
         }
 
+    @cached_property
+    def qq_uin_to_role_set_map(self) -> dict[int, frozenset[str]]:
+        # 反向索引，查询某个 QQ 号的身份时只需一次字典查找
+        qq_uin_to_role_set_map: dict[int, set[str]] = {}
+        for role, qq_uin_list in self.role_to_qq_uin_list_map.items():
+            for qq_uin in qq_uin_list:
+                qq_uin_to_role_set_map.setdefault(qq_uin, set()).add(role)
+        return {
+            qq_uin: frozenset(role_set)
+            for qq_uin, role_set in qq_uin_to_role_set_map.items()
+        }
+
 
 class CQHTTPGroupMessageCommandHandlerPlugin(NYAPlugin[EventT, StateT, ConfigT], ABC):
     """
@@ -47,6 +81,17 @@ class CQHTTPGroupMessageCommandHandlerPlugin(NYAPlugin[EventT, StateT, ConfigT],
     logger = get_logger(plugin="CQHTTPGroupMessageCommandHandlerPlugin")
     command: RootCommand | LeafCommand
 
+    # 命令名到命令处理插件的映射，供帮助命令按名称查找插件
+    # 重名时（例如插件热重载后）以最后注册的插件为准；消息的分发不经过这个映射
+    registered_command_handler_plugin_map: dict[
+        str, type["CQHTTPGroupMessageCommandHandlerPlugin[Any, Any, Any]"]
+    ] = {}
+    # 上面的映射每变化一次加一，依赖该映射的缓存据此判断是否失效
+    registered_command_handler_plugin_map_version: int = 0
+
+    # rule() 接受事件时保存的消息文本，供 handle() 使用
+    _message_str: str
+
     def __init_subclass__(
         cls,
         config: type[ConfigT] | None = None,
@@ -55,160 +100,199 @@ class CQHTTPGroupMessageCommandHandlerPlugin(NYAPlugin[EventT, StateT, ConfigT],
     ) -> None:
         super().__init_subclass__(config, init_state, **_kwargs)
 
-        cls.logger = get_logger(plugin=cls.__name__)
-
         CQHTTPGroupMessageCommandHandlerPlugin.logger.info(
             "Loading plugin: ",
             base=CQHTTPGroupMessageCommandHandlerPlugin.__name__,
             plugin=cls.__name__,
         )
 
-        if not hasattr(cls, "command") or not isinstance(
-            getattr(cls, "command"), RootCommand | LeafCommand
-        ):
+        # 只取一次属性；不存在时 None 同样通不过类型检查
+        if not isinstance(getattr(cls, "command", None), _COMMAND_TYPES):
             raise ValueError(
                 f'Missing required attribute "command: RootCommand | LeafCommand" in plugin {cls.__name__!r}'
             )
 
         cls.registered_nyaplugin_list.append(cls)
 
+        # 不同插件使用同一命令名时，帮助命令只能找到后注册的插件，记录警告
+        # 热重载时同一个插件会重新注册，不算重名
+        registered_plugin = cls.registered_command_handler_plugin_map.get(
+            cls.command.name
+        )
+        if registered_plugin is not None and (
+            registered_plugin.__module__,
+            registered_plugin.__qualname__,
+        ) != (cls.__module__, cls.__qualname__):
+            CQHTTPGroupMessageCommandHandlerPlugin.logger.warning(
+                "Duplicate command name: ",
+                command_name=cls.command.name,
+                registered_plugin=registered_plugin.__name__,
+                plugin=cls.__name__,
+            )
+        cls.registered_command_handler_plugin_map[cls.command.name] = cls
+        base = CQHTTPGroupMessageCommandHandlerPlugin
+        base.registered_command_handler_plugin_map_version += 1
+
     @override
     @final
     async def rule(self) -> bool:
-        self.logger.info(
+        # 热路径上多次使用，先取到局部变量
+        cls, logger, event = self.__class__, self.logger, self.event
+
+        logger.info(
             f"Received Event: ",
-            event_=self.event,
-            plugin=self.__class__.__name__,
+            event_=event,
+            plugin=cls.__name__,
         )
 
         # 运行时 event 类型仍可能不满足，需检查
-        if not isinstance(self.event, GroupMessageEvent):  # type: ignore
-            self.logger.info(f"Event rejected: Not a GroupMessageEvent")
+        if not isinstance(event, GroupMessageEvent):  # type: ignore
+            logger.info(f"Event rejected: Not a GroupMessageEvent")
+            return False
+
+        # 消息的第一部分不是本命令名，静默丢弃
+        # 每个插件只与自己的命令名比较，命令名相同的插件都会接受该消息
+        # 先检查前缀，绝大多数消息在这里就被拒绝，不必拆分；空消息也在这里被拒绝
+        message_str = str(event.message)
+        command_name = cls.command.name
+        if not message_str.lstrip().startswith(command_name):
+            logger.info(
+                f"Event rejected: Filtered by command name: ",
+                command_name=command_name,
+            )
+            return False
+        # 前缀匹配后再用有限次拆分确认第一部分恰好是命令名（排除 "demox" 这类情况）
+        if (first_command_part := message_str.split(None, 1)[0]) != command_name:
+            logger.info(
+                f"Event rejected: Filtered by command name: ",
+                first_command_part=first_command_part,
+                command_name=command_name,
+            )
             return False
 
         # 群聊不在限定的群聊中，静默丢弃
         if (limited_group_id_set := self.config.limited_group_id_set) and (
-            group_id := self.event.group_id
+            group_id := event.group_id
         ) not in limited_group_id_set:
-            self.logger.info(
+            logger.info(
                 f"Event rejected: Filtered by limited_group_ids: ",
                 group_id=group_id,
                 limited_group_id_set=limited_group_id_set,
             )
             return False
 
-        # 消息的第一部分不是本命令名，静默丢弃
-        if not (first_command_part := str(self.event.message).strip().split()[0]) == (
-            command_name := self.__class__.command.name
-        ):
-            self.logger.info(
-                f"Event rejected: Filtered by command name: ",
-                first_command_part=first_command_part,
-                command_name=command_name,
-            )
-            return False
+        # handle() 直接使用这里的消息文本，不再重新转换
+        self._message_str = message_str
 
-        self.logger.info(f"Event accepted")
+        logger.info(f"Event accepted")
         return True
 
     @override
     @final
     async def handle(self) -> None:
-        self.logger.info(
+        # 热路径上多次使用，先取到局部变量
+        cls, logger, event = self.__class__, self.logger, self.event
+        # Plugin.config 每次访问都要经过 bot.config.plugin 查找，只取一次
+        config = self.config
+
+        logger.info(
             "Event handling",
-            event_=self.event,
-            plugin=self.__class__.__name__,
+            event_=event,
+            plugin=cls.__name__,
         )
 
-        roles = self._get_roles()
+        roles = self._get_roles(config, event.sender.user_id)
 
-        command_part_list = shlex.split(str(self.event.message))
+        command_part_list = _split_command(self._message_str)
         command, raw_args, permission_denied = self._parse_command(
             command_part_list, roles
         )
 
         if permission_denied:
-            self.logger.error(
+            logger.error(
                 "Permission denied: ",
                 command=command.full_name,
                 limited_roles=command.limited_roles,
                 roles=roles,
             )
-            await self.event.reply(f"{command.full_name!r}：权限不足")
+            await event.reply(f"{command.full_name!r}：权限不足")
             return
 
         if not isinstance(command, LeafCommand):
             # 命令不全
             if not raw_args:
-                self.logger.error("Incomplete command: ", command=command.full_name)
-                await self.event.reply(command.help_info(roles=roles))
+                logger.error("Incomplete command: ", command=command.full_name)
+                await event.reply(command.help_info(roles=roles))
                 return
 
             # 请求帮助信息
             if raw_args[0] in ("-h", "--help"):
-                await self.event.reply(command.help_info(roles=roles))
+                await event.reply(command.help_info(roles=roles))
                 return
 
             # 错误的子命令
-            self.logger.error(
+            logger.error(
                 "Invalid command: ", command=command.full_name, subcommand=raw_args[0]
             )
-            await self.event.reply(
-                f"{command.full_name!r}：无效的子命令 {raw_args[0]!r}"
+            # 错误提示和帮助信息合并为一条消息发送
+            await event.reply(
+                f"{command.full_name!r}：无效的子命令 {raw_args[0]!r}\n"
+                + command.help_info(roles)
             )
-            await self.event.reply(command.help_info(roles))
             return
 
         # 请求帮助信息
         if raw_args and raw_args[0] in ("-h", "--help"):
-            await self.event.reply(command.help_info(roles=roles))
+            await event.reply(command.help_info(roles=roles))
             return
 
+        # 参数检查失败时即使是异步回调也会直接返回 ReturnValue，因此按返回值判断
+        # ReturnValue 是普通类，isinstance 不需要走 Awaitable 这类 ABC 的 __instancecheck__
         ret = command.function(self, raw_args)
-        if isinstance(ret, Awaitable):
+        if not isinstance(ret, ReturnValue):
             ret = await ret
 
         if ret.code != 0:
             if ret.log:
-                self.logger.error("Error occurred: ", error=ret.log)
+                logger.error("Error occurred: ", error=ret.log)
             else:
-                self.logger.error("Unknown error occurred")
+                logger.error("Unknown error occurred")
         elif ret.log:
-            self.logger.info("Message: ", info=ret.log)
+            logger.info("Message: ", info=ret.log)
 
         if ret.reply:
-            await self.event.reply(ret.reply)
+            await event.reply(ret.reply)
 
-        if ret.report and self.config.report_gid:
+        if ret.report and config.report_gid:
             await self.report(message=ret.report)
 
         if ret.need_help:
-            await self.event.reply(command.help_info(roles))
+            await event.reply(command.help_info(roles))
 
-        self.logger.info(
+        logger.info(
             "Event finished",
-            event_=self.event,
-            plugin=self.__class__.__name__,
+            event_=event,
+            plugin=cls.__name__,
         )
 
     @final
-    def _get_roles(self) -> set[str]:
-        return {
-            role
-            for role, qq_uin_set in self.config.role_to_qq_uin_set_map.items()
-            if self.event.sender.user_id in qq_uin_set
-        }
+    @staticmethod
+    def _get_roles(
+        config: CQHTTPGroupMessageCommandHandlerPluginConfig, user_id: int
+    ) -> frozenset[str]:
+        return config.qq_uin_to_role_set_map.get(user_id, frozenset())
 
     @final
+    @classmethod
     def _parse_command(
-        self, command_part_list: list[str], roles: set[str]
+        cls, command_part_list: list[str], roles: frozenset[str]
     ) -> tuple[Command, list[str], bool]:
         # 返回 <命令，参数，是否无权访问>
-        if self.command.limited_roles and not (self.command.limited_roles & roles):
+        if cls.command.limited_roles and roles.isdisjoint(cls.command.limited_roles):
             # 命令无权限
-            return self.command, command_part_list[1:], True
+            return cls.command, command_part_list[1:], True
 
-        current_command = self.command
+        current_command = cls.command
         subcommand_idx = 1
         while isinstance(current_command, InternalCommand):
             # 命令参数消耗完
@@ -216,20 +300,17 @@ class CQHTTPGroupMessageCommandHandlerPlugin(NYAPlugin[EventT, StateT, ConfigT],
                 return current_command, [], False
 
             # 查找子命令
-            next_command = next(
-                (
-                    subcommand
-                    for subcommand in current_command.subcommand_list
-                    if subcommand.name == command_part_list[subcommand_idx]
-                ),
-                None,
+            next_command = current_command.subcommand_by_name.get(
+                command_part_list[subcommand_idx]
             )
 
             # 未找到子命令
             if next_command is None:
                 return current_command, command_part_list[subcommand_idx:], False
             # 子命令无权限
-            if next_command.limited_roles and not (next_command.limited_roles & roles):
+            if next_command.limited_roles and roles.isdisjoint(
+                next_command.limited_roles
+            ):
                 return next_command, command_part_list[subcommand_idx + 1 :], True
 
             current_command = next_command
@@ -1,5 +1,7 @@
+import asyncio
 import json
 import os
+import shutil
 from abc import ABC
 from typing import Any, Optional, TypeVar, cast, final
 
@@ -8,11 +10,82 @@ from alicebot.adapter.cqhttp import CQHTTPAdapter
 from alicebot.config import PluginConfig
 from structlog import get_logger
 
+try:
+    import orjson
+except ImportError:  # 没有安装 orjson 时退回标准库 json
+    orjson = None
+
 EventT = TypeVar("EventT", bound=Event[CQHTTPAdapter])  # 不是 CQHTTP 的适配器我不做
 StateT = TypeVar("StateT", bound="NYAPluginState")
 ConfigT = TypeVar("ConfigT", bound="NYAPluginConfig")
 
 
+def _loads_state(raw: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _dumps_state(obj: Any) -> bytes:
+    if orjson is not None:
+        # 与 json.dump 保持一致，允许非字符串的键（例如以群号为键的字典）
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj).encode()
+
+
+def _read_state_file(state_store_path: str) -> Optional[bytes]:
+    # 文件不存在时返回 None；直接打开而不是先检查是否存在，避免检查与打开之间文件被删除
+    try:
+        with open(state_store_path, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def _write_state_file(
+    state_store_path: str, raw_state: bytes, backup_state_file: bool
+) -> bool:
+    # 先完整写入临时文件再原子替换，写入途中崩溃也不会留下残缺的状态文件
+    tmp_state_store_path = state_store_path + ".tmp"
+    try:
+        with open(tmp_state_store_path, "wb") as f:
+            f.write(raw_state)
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        # 写入失败时删除临时文件，不留下残缺的 .tmp
+        try:
+            os.unlink(tmp_state_store_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+    # 按配置保留一份旧的状态文件，返回是否进行了备份
+    # 备份时不移走原文件，任何时刻崩溃都至少有一份完整的状态文件在原路径上
+    backed_up = False
+    if backup_state_file:
+        backed_up = _backup_state_file(state_store_path)
+    os.replace(tmp_state_store_path, state_store_path)
+    return backed_up
+
+
+def _backup_state_file(state_store_path: str) -> bool:
+    # 用硬链接保留旧的状态文件，替换后 .bak 仍指向旧内容；不支持硬链接的文件系统上改为复制
+    bak_state_store_path = state_store_path + ".bak"
+    try:
+        os.unlink(bak_state_store_path)
+    except FileNotFoundError:
+        pass
+    try:
+        os.link(state_store_path, bak_state_store_path)
+    except FileNotFoundError:
+        # 还没有状态文件，不需要备份
+        return False
+    except OSError:
+        shutil.copy2(state_store_path, bak_state_store_path)
+    return True
+
+
 class NYAPluginState:
     """
     NYAPlugin 状态类。
@@ -31,6 +104,9 @@ class NYAPluginConfig(PluginConfig):
     # 状态存储文件名。为 None 则不会加载/存储该插件状态。
     state_filename: Optional[str] = None
 
+    # 存储状态时是否把旧的状态文件保留为 .bak。
+    backup_state_file: bool = False
+
     # 上报群 ID，可以上报一些调试信息，不用进入后台查看。为 None 会丢弃所有上报内容。
     report_gid: Optional[int] = None
 
@@ -40,38 +116,87 @@ class NYAPlugin(Plugin[EventT, StateT, ConfigT], ABC):
 
     registered_nyaplugin_list: list[type["NYAPlugin[Any, Any, Any]"]] = []
 
+    # 上报群 ID 到等待发送的上报内容及其完成通知的映射，所有插件共享
+    # 映射中有某个上报群时，该群的后台发送任务正在运行
+    _pending_report_map: dict[int, list[tuple[str, "asyncio.Future[None]"]]] = {}
+    # 各上报群的后台发送任务
+    _report_task_set: set["asyncio.Task[None]"] = set()
+
+    def __init_subclass__(
+        cls,
+        config: Optional[type[ConfigT]] = None,
+        init_state: Optional[StateT] = None,
+        **_kwargs: Any,
+    ) -> None:
+        super().__init_subclass__(config, init_state, **_kwargs)
+
+        # 每个子类使用自己的 logger，日志中的 plugin 字段才是实际的插件名
+        # 这里不提前 bind()：插件类在 alicebot 配置 structlog 之前加载，提前绑定会绕过日志等级设置
+        cls.logger = get_logger(plugin=cls.__name__)
+
     @final
     @classmethod
-    async def load_state(cls, bot: Bot) -> bool:
-        # 读取配置
+    def _get_config(cls, bot: Bot) -> Optional[ConfigT]:
+        # 不实例化插件，直接按配置名读取插件配置
         config = getattr(bot.config.plugin, cls.Config.__config_name__, None)
+        return cast(Optional[ConfigT], config)
+
+    @final
+    @classmethod
+    def is_stateful(cls, bot: Bot) -> bool:
+        # 配置了状态存储文件名的插件才需要加载/存储状态
+        config = cls._get_config(bot)
+        return bool(config and config.state_filename)
+
+    @final
+    @classmethod
+    def _get_state_config(cls, bot: Bot) -> Optional[ConfigT]:
+        # 读取配置
+        config = cls._get_config(bot)
         if not config:
             cls.logger.info("Config not found")
-            return False
+            return None
 
         # 读取状态存储文件名
-        state_filename = cast(NYAPluginConfig, config).state_filename
-        if not state_filename:
+        if not config.state_filename:
             cls.logger.info("State filename not set")
-            return False
-        state_store_path = f"data/{state_filename}"
+            return None
 
-        # 初始化状态
-        if not bot.plugin_state[cls.__name__]:
-            bot.plugin_state[cls.__name__] = cls().__init_state__()
-        if not bot.plugin_state[cls.__name__]:
+        return config
+
+    @final
+    @classmethod
+    def _ensure_state(cls, bot: Bot) -> Optional[NYAPluginState]:
+        # 初始化状态，只在状态不存在时实例化一次插件
+        plugin_state, plugin_name = bot.plugin_state, cls.__name__
+        state = plugin_state.get(plugin_name)
+        if not state:
+            state = plugin_state[plugin_name] = cls().__init_state__()
+        if not state:
             # __init_state__ 返回了 None
             cls.logger.info("State not initialized")
+            return None
+
+        return cast(NYAPluginState, state)
+
+    @final
+    @classmethod
+    async def load_state(cls, bot: Bot) -> bool:
+        config = cls._get_state_config(bot)
+        if not config:
+            return False
+        state_store_path = f"data/{config.state_filename}"
+
+        state = cls._ensure_state(bot)
+        if not state:
             return False
 
-        # 读取状态
-        if not os.path.exists(state_store_path):
+        # 读取状态，文件 I/O 放到线程中执行，不阻塞事件循环
+        raw_state = await asyncio.to_thread(_read_state_file, state_store_path)
+        if raw_state is None:
             cls.logger.info("State file not found")
             return False
-        with open(state_store_path, "r") as f:
-            await cast(NYAPluginState, bot.plugin_state[cls.__name__]).from_dict(
-                json.load(f)
-            )
+        await state.from_dict(_loads_state(raw_state))
         cls.logger.info("State loaded")
 
         return True
@@ -79,46 +204,128 @@ class NYAPlugin(Plugin[EventT, StateT, ConfigT], ABC):
     @final
     @classmethod
     async def save_state(cls, bot: Bot) -> bool:
-        # 读取配置
-        config = getattr(bot.config.plugin, cls.Config.__config_name__, None)
+        config = cls._get_state_config(bot)
         if not config:
-            cls.logger.info("Config not found")
-            return False
-
-        # 读取状态存储文件名
-        state_filename = cast(NYAPluginConfig, config).state_filename
-        if not state_filename:
-            cls.logger.info("State filename not set")
             return False
+        state_store_path = f"data/{config.state_filename}"
 
-        state_store_path = f"data/{state_filename}"
-
-        # 初始化状态
-        if not bot.plugin_state[cls.__name__]:
-            bot.plugin_state[cls.__name__] = cls().__init_state__()
-        if not bot.plugin_state[cls.__name__]:
-            # __init_state__ 返回了 None
-            cls.logger.info("State not initialized")
+        state = cls._ensure_state(bot)
+        if not state:
             return False
 
-        # 写入状态
-        if os.path.exists(state_store_path):
+        # 写入状态，文件 I/O 放到线程中执行，不阻塞事件循环
+        raw_state = _dumps_state(await state.to_dict())
+        if await asyncio.to_thread(
+            _write_state_file, state_store_path, raw_state, config.backup_state_file
+        ):
             cls.logger.info("State file backed up")
-            os.rename(state_store_path, state_store_path + ".bak")
-        with open(state_store_path, "w") as f:
-            json.dump(
-                await cast(NYAPluginState, bot.plugin_state[cls.__name__]).to_dict(), f
-            )
         cls.logger.info("State saved")
 
         return True
 
     @final
-    async def report(self, message: str) -> None:
+    async def report(self, message: str, await_send: bool = False) -> None:
+        """
+        上报消息到插件配置的上报群。
+
+        :param str message: 上报内容
+        :param bool await_send: 是否等待发送完成；为 True 时等待所在的合并批次发出，发送失败时抛出异常；默认在后台发送，不阻塞调用方
+        """
         if not self.config.report_gid:
             self.logger.info("Report group not specified, discard report info")
             return
 
-        await self.event.adapter.send_group_msg(
-            group_id=self.config.report_gid, message=message
-        )
+        report_future = self._enqueue_report(self.config.report_gid, message)
+        if await_send:
+            await report_future
+            return
+
+        # 不等待时没有人取出异常；发送失败已在后台发送任务中按批记录
+        report_future.add_done_callback(self._on_report_future_done)
+
+    @final
+    @staticmethod
+    def _on_report_future_done(report_future: "asyncio.Future[None]") -> None:
+        # 只取出异常，避免未获取异常的警告
+        if not report_future.cancelled():
+            report_future.exception()
+
+    @final
+    def _enqueue_report(self, report_gid: int, message: str) -> "asyncio.Future[None]":
+        """
+        把上报加入所在上报群的队列，没有后台发送任务时启动一个。
+
+        :param int report_gid: 上报群 ID
+        :param str message: 上报内容
+        :return asyncio.Future[None]: 所在批次发送成功或失败时设置结果
+        """
+        report_future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+
+        # 同一上报群已有后台发送任务时，合并到下一批
+        pending_report_list = NYAPlugin._pending_report_map.get(report_gid)
+        if pending_report_list is None:
+            pending_report_list = NYAPlugin._pending_report_map[report_gid] = []
+            # 保存任务引用，避免任务在完成前被回收
+            report_task = asyncio.create_task(
+                NYAPlugin._drain_report_queue(self.bot, report_gid)
+            )
+            NYAPlugin._report_task_set.add(report_task)
+            report_task.add_done_callback(NYAPlugin._report_task_set.discard)
+        pending_report_list.append((message, report_future))
+        return report_future
+
+    @final
+    @staticmethod
+    async def _drain_report_queue(bot: Bot, report_gid: int) -> None:
+        """
+        上报群的后台发送任务：把队列中的上报合并成一批发送，直到队列为空。
+        一批上报可能来自不同插件，发送时从 bot 取 CQHTTP 适配器，而不是用某个插件事件的适配器。
+
+        :param Bot bot: 机器人对象
+        :param int report_gid: 上报群 ID
+        """
+        pending_report_list = NYAPlugin._pending_report_map[report_gid]
+        batched_report_list: list[tuple[str, asyncio.Future[None]]] = []
+        try:
+            while pending_report_list:
+                # 已被调用方取消的上报不再发送
+                batched_report_list = [
+                    (batched_report, batched_report_future)
+                    for batched_report, batched_report_future in pending_report_list
+                    if not batched_report_future.done()
+                ]
+                pending_report_list.clear()
+                if not batched_report_list:
+                    continue
+                batched_message = "\n".join(
+                    batched_report for batched_report, _ in batched_report_list
+                )
+                try:
+                    await bot.get_adapter(CQHTTPAdapter).send_group_msg(
+                        group_id=report_gid, message=batched_message
+                    )
+                except Exception as e:
+                    # 一批发送失败时记录整批内容，并把异常交给这一批的每个调用方
+                    # 之后排队的上报继续发送，不丢弃
+                    NYAPlugin.logger.exception(
+                        "Report failed",
+                        report_gid=report_gid,
+                        report_count=len(batched_report_list),
+                        report=batched_message,
+                    )
+                    # 每个调用方各自收到一个新的异常，避免多个任务同时重新抛出同一个异常对象
+                    for _, batched_report_future in batched_report_list:
+                        if not batched_report_future.done():
+                            report_error = RuntimeError("Report failed")
+                            report_error.__cause__ = e
+                            batched_report_future.set_exception(report_error)
+                else:
+                    for _, batched_report_future in batched_report_list:
+                        if not batched_report_future.done():
+                            batched_report_future.set_result(None)
+        finally:
+            del NYAPlugin._pending_report_map[report_gid]
+            # 发送任务被取消时（例如事件循环关闭），取消仍在等待的上报，避免调用方一直等待
+            for _, report_future_left in (*batched_report_list, *pending_report_list):
+                if not report_future_left.done():
+                    report_future_left.cancel()
@@ -1,4 +1,5 @@
-from typing import TypeVar
+from collections import OrderedDict
+from typing import Any, TypeVar
 
 from alicebot.adapter.cqhttp.event import GroupMessageEvent
 
@@ -29,17 +30,17 @@ class CommandHelperPlugin(
     'help': NYABot 帮助命令
     """
 
-    def _get_available_command_handler_plugin_list(
-        self,
-    ) -> list[
-        type[
-            CQHTTPGroupMessageCommandHandlerPlugin[
-                GroupMessageEvent,
-                NYAPluginState,
-                CQHTTPGroupMessageCommandHandlerPluginConfig,
-            ]
-        ]
-    ]:
+    # (群 ID, QQ 号) -> 可用命令列表的回复文本，按最近使用淘汰，最多保留 maxsize 项
+    # 结果只依赖群 ID、用户在各插件配置中的身份和各插件配置，而各插件的身份映射互相独立，
+    # 因此仍按 QQ 号缓存；bot 配置重新加载或命令处理插件注册变化时整个缓存失效
+    _available_command_list_reply_cache: OrderedDict[tuple[int, int], str] = (
+        OrderedDict()
+    )
+    _available_command_list_reply_cache_maxsize = 256
+    _available_command_list_reply_cache_config: Any = None
+    _available_command_list_reply_cache_registry_version = -1
+
+    def _get_available_command_list_reply(self) -> str:
         available_command_handler_plugin_list: list[
             type[
                 CQHTTPGroupMessageCommandHandlerPlugin[
@@ -50,83 +51,95 @@ class CommandHelperPlugin(
             ]
         ] = []
 
-        for plugin in self.registered_nyaplugin_list:
-            # 筛选命令处理插件
-            if not issubclass(plugin, CQHTTPGroupMessageCommandHandlerPlugin):
+        cls = CommandHelperPlugin
+        reply_cache = cls._available_command_list_reply_cache
+        if (
+            cls._available_command_list_reply_cache_config is not self.bot.config
+            or cls._available_command_list_reply_cache_registry_version
+            != cls.registered_command_handler_plugin_map_version
+        ):
+            reply_cache.clear()
+            cls._available_command_list_reply_cache_config = self.bot.config
+            cls._available_command_list_reply_cache_registry_version = (
+                cls.registered_command_handler_plugin_map_version
+            )
+        cache_key = (self.event.group_id, self.event.sender.user_id)
+        if (cached := reply_cache.get(cache_key)) is not None:
+            reply_cache.move_to_end(cache_key)
+            return cached
+
+        bot, group_id, user_id = (
+            self.bot,
+            self.event.group_id,
+            self.event.sender.user_id,
+        )
+        # 命令名映射中只有命令处理插件，不必再逐个用 issubclass 筛选
+        # 筛选只需要插件配置，不实例化插件
+        for plugin in self.registered_command_handler_plugin_map.values():
+            config = plugin._get_config(bot)
+            if not config:
                 continue
 
-            plugin_instance = plugin()
-            plugin_instance.event = self.event
             # 根据群 ID 筛选
             if (
-                plugin_instance.config.limited_group_id_set
-                and self.event.group_id
-                not in plugin_instance.config.limited_group_id_set
-            ):
+                limited_group_id_set := config.limited_group_id_set
+            ) and group_id not in limited_group_id_set:
                 continue
 
             # 根据身份筛选
-            if plugin.command.limited_roles and not (
-                plugin.command.limited_roles & plugin_instance._get_roles()
-            ):
+            if plugin.command.limited_roles and plugin._get_roles(
+                config, user_id
+            ).isdisjoint(plugin.command.limited_roles):
                 continue
 
             available_command_handler_plugin_list.append(plugin)
 
-        return available_command_handler_plugin_list
+        available_command_list_reply = (
+            (
+                "可用的命令列表：\n"
+                + "\n".join(
+                    f"* {registered_plugin.command.name}：{registered_plugin.command.desc}"
+                    for registered_plugin in available_command_handler_plugin_list
+                )
+            )
+            if available_command_handler_plugin_list
+            else "没有可用命令"
+        )
+        reply_cache[cache_key] = available_command_list_reply
+        if len(reply_cache) > cls._available_command_list_reply_cache_maxsize:
+            reply_cache.popitem(last=False)
+        return available_command_list_reply
+
+    async def _reply_available_command_list(self, header: str = "") -> None:
+        """
+        回复可用命令列表，每次调用只生成（或从缓存取出）一次列表文本。
+
+        :param str header: 放在列表前的提示，与列表合并为一条消息发送
+        """
+        await self.event.reply(header + self._get_available_command_list_reply())
 
     async def help(self, *command_parts: str) -> ReturnValue:
         # 没有参数，列出所有可用命令
         if not command_parts:
-            available_command_handler_plugin_list = (
-                self._get_available_command_handler_plugin_list()
-            )
-            await self.event.reply(
-                (
-                    "可用的命令列表：\n"
-                    + "\n".join(
-                        f"* {registered_plugin.command.name}：{registered_plugin.command.desc}"
-                        for registered_plugin in available_command_handler_plugin_list
-                    )
-                )
-                if available_command_handler_plugin_list
-                else "没有可用命令"
-            )
+            await self._reply_available_command_list()
             return ReturnValue(0)
 
         # 查找对应的命令处理插件
-        plugin = next(
-            (
-                plugin
-                for plugin in self.registered_nyaplugin_list
-                if issubclass(plugin, CQHTTPGroupMessageCommandHandlerPlugin)
-                and plugin.command.name == command_parts[0]
-            ),
-            None,
-        )
+        plugin = self.registered_command_handler_plugin_map.get(command_parts[0])
         if not plugin:
-            await self.event.reply(f"找不到命令：{command_parts[0]}")
-            available_command_handler_plugin_list = (
-                self._get_available_command_handler_plugin_list()
-            )
-            await self.event.reply(
-                (
-                    "可用的命令列表：\n"
-                    + "\n".join(
-                        f"* {registered_plugin.command.name}：{registered_plugin.command.desc}"
-                        for registered_plugin in available_command_handler_plugin_list
-                    )
-                )
-                if available_command_handler_plugin_list
-                else "没有可用命令"
+            await self._reply_available_command_list(
+                f"找不到命令：{command_parts[0]}\n"
             )
             return ReturnValue(1, log=f"Command not found: {command_parts[0]}")
 
         # 查找对应的命令
-        plugin_instance = plugin()
-        plugin_instance.event = self.event
-        roles = plugin_instance._get_roles()
-        command, args, permission_denied = plugin_instance._parse_command(
+        config = plugin._get_config(self.bot)
+        roles = (
+            plugin._get_roles(config, self.event.sender.user_id)
+            if config
+            else frozenset()
+        )
+        command, args, permission_denied = plugin._parse_command(
             list(command_parts), roles
         )
 